@@ -0,0 +1,37 @@
+import http.server
+import importlib.util
+import pathlib
+import threading
+
+import pytest
+
+
+INSTALLER = pathlib.Path(__file__).resolve().parent.parent / "install_ubuntu_2204.py"
+
+
+@pytest.fixture(scope="session")
+def installer():
+    # The installer is a single script, not an importable package
+    spec = importlib.util.spec_from_file_location("install_ubuntu_2204", INSTALLER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def http_server(monkeypatch):
+    # Serves the given BaseHTTPRequestHandler subclass on localhost,
+    # returns its base URL
+    monkeypatch.setenv("no_proxy", "*")
+    servers = []
+
+    def serve(handler):
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
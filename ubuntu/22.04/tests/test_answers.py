@@ -0,0 +1,99 @@
+import json
+import os
+import sys
+
+import pytest
+
+
+ANSWERS = {
+    "install-dir": "~/git/repos/OpenStudioLandscapes",
+    "reboot": "never",
+    "steps": "install_python,install_docker",
+    "skip_steps": ["harbor_init"],
+    "ssh_confirmed": True,
+}
+
+EXPECTED = {
+    "install_dir": "~/git/repos/OpenStudioLandscapes",
+    "reboot": "never",
+    "steps": ("install_python", "install_docker"),
+    "skip_steps": ("harbor_init",),
+    "ssh_confirmed": True,
+}
+
+
+def _toml(answers):
+    lines = []
+    for key, value in answers.items():
+        if isinstance(value, bool):
+            lines.append(f"{key} = {str(value).lower()}")
+        else:
+            lines.append(f"{key} = {json.dumps(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def test_load_json(installer, tmp_path):
+    path = tmp_path / "answers.json"
+    path.write_text(json.dumps(ANSWERS))
+    assert installer.answers_load(path) == EXPECTED
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="tomllib")
+def test_load_toml(installer, tmp_path):
+    path = tmp_path / "answers.toml"
+    path.write_text(_toml(ANSWERS))
+    assert installer.answers_load(path) == EXPECTED
+
+
+def test_load_yaml(installer, tmp_path):
+    yaml = pytest.importorskip("yaml")
+    path = tmp_path / "answers.yaml"
+    path.write_text(yaml.safe_dump(ANSWERS))
+    assert installer.answers_load(path) == EXPECTED
+
+
+@pytest.mark.parametrize("content, error", [
+    ('{"install_dirr": "/opt"}', "unknown answer: install_dirr"),
+    ('["/opt"]', "expected a mapping of answers"),
+])
+def test_load_rejects(installer, tmp_path, content, error):
+    path = tmp_path / "answers.json"
+    path.write_text(content)
+    with pytest.raises(ValueError, match=error):
+        installer.answers_load(path)
+
+
+def test_errors_create_nothing(installer, tmp_path):
+    install_dir = tmp_path / "git" / "repos" / "OpenStudioLandscapes"
+    answers = installer.Answers(install_dir=install_dir.as_posix())
+
+    assert answers.errors() == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_errors_list_every_bad_answer(installer, tmp_path):
+    (tmp_path / "file").write_text("")
+    answers = installer.Answers(
+        install_dir=(tmp_path / "file" / "repos" / "OpenStudioLandscapes").as_posix(),
+        harbor_url="harbor.farm.local",
+        python_version="3.11",
+        reboot="sometimes",
+        ssh_email="nobody",
+    )
+
+    assert [error.split(":", 1)[0] for error in answers.errors()] == [
+        "install_dir", "python_version", "harbor_url", "reboot", "ssh_email",
+    ]
+    assert installer.Answers(install_dir="git/repos/OpenStudioLandscapes").errors() == [
+        "install_dir: Directory git/repos/OpenStudioLandscapes is not absolute (~ is allowed).",
+    ]
+
+
+@pytest.mark.skipif(os.geteuid() == 0, reason="root can write anywhere")
+def test_errors_report_an_unwritable_parent(installer, tmp_path):
+    (tmp_path / "locked").mkdir(mode=0o555)
+    answers = installer.Answers(install_dir=(tmp_path / "locked" / "repos" / "OpenStudioLandscapes").as_posix())
+
+    [error] = answers.errors()
+    assert error.startswith(f"install_dir: Unable to write to {(tmp_path / 'locked').as_posix()}.")
+    assert not (tmp_path / "locked" / "repos").exists()
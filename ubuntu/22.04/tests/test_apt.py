@@ -0,0 +1,40 @@
+import pathlib
+
+
+DPKG_STATUS = pathlib.Path(__file__).resolve().parent / "data" / "dpkg_status"
+
+
+def test_dpkg_status_counts_only_installed_packages(installer):
+    status = installer.DpkgStatus(DPKG_STATUS)
+    assert status.satisfied("curl")
+    # Half-configured or only configuration files left: install again
+    assert not status.satisfied("libssl-dev")
+    assert not status.satisfied("python3-venv")
+    assert status.missing(["curl", "libssl-dev", "python3-venv", "unknown"]) == ["libssl-dev", "python3-venv", "unknown"]
+
+
+def test_dpkg_status_architecture_and_pinned_versions(installer):
+    status = installer.DpkgStatus(DPKG_STATUS)
+    assert status.satisfied("git:amd64")
+    assert not status.satisfied("git:arm64")
+    assert status.satisfied("docker-ce=5:27.1.1-1~ubuntu.22.04~jammy")
+    assert not status.satisfied("docker-ce=5:26.0.0-1~ubuntu.22.04~jammy")
+    assert status.satisfied("git:amd64=1:2.34.1-1ubuntu1.11")
+
+
+def test_dpkg_status_missing_file(installer, tmp_path):
+    assert installer.DpkgStatus(tmp_path / "status").missing(["curl"]) == ["curl"]
+
+
+def test_apt_fingerprint_follows_the_request_not_the_plan(installer, tmp_path, monkeypatch):
+    dpkg_status = installer.DpkgStatus
+
+    def _fingerprint(status_file, **kwargs):
+        monkeypatch.setattr(installer, "DpkgStatus", lambda: dpkg_status(status_file))
+        steps = installer.install_steps(tmp_path / "install", "user", **kwargs)
+        apt = next(step for step in steps if step.name == "apt")
+        return installer.Checkpoint.fingerprint(apt, apt.script())
+
+    # Nothing installed, then some of it: the same request
+    assert _fingerprint(tmp_path / "status") == _fingerprint(DPKG_STATUS)
+    assert _fingerprint(DPKG_STATUS) != _fingerprint(DPKG_STATUS, skip=("install_python",))
@@ -0,0 +1,92 @@
+import hashlib
+import http.server
+import inspect
+import io
+import tarfile
+
+import pytest
+
+
+def _archive():
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        data = bytes(range(256)) * 4096
+        info = tarfile.TarInfo("src/data")
+        info.size = len(data)
+        archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+ARCHIVE = _archive()
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    # Drops the first connection halfway through the body, honors
+    # Range afterwards
+    ranges = []
+
+    def do_GET(self):
+        offset = 0
+        if self.headers["Range"] is not None:
+            offset = int(self.headers["Range"][len("bytes="):-1])
+        type(self).ranges.append(self.headers["Range"])
+        self.send_response(206 if offset else 200)
+        self.send_header("Content-Length", str(len(ARCHIVE) - offset))
+        self.end_headers()
+        if len(self.ranges) == 1:
+            self.wfile.write(ARCHIVE[:len(ARCHIVE) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(ARCHIVE[offset:])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(http_server, monkeypatch, installer):
+    monkeypatch.setattr(_Handler, "ranges", [])
+    monkeypatch.setattr(installer.time, "sleep", lambda seconds: None)
+    return http_server(_Handler) + "/Python.tgz"
+
+
+def test_fetch_resumes_an_interrupted_download(installer, server, tmp_path):
+    cache = installer.DownloadCache(tmp_path / "cache")
+    blob = cache.fetch(server, hashlib.sha256(ARCHIVE).hexdigest(), echo=lambda line: None)
+    assert blob.read_bytes() == ARCHIVE
+    assert _Handler.ranges == [None, f"bytes={len(ARCHIVE) // 2}-"]
+    # Known now: no second download
+    assert cache.fetch(server, echo=lambda line: None) == blob
+    assert len(_Handler.ranges) == 2
+
+
+def test_unpack_resumes_an_interrupted_stream(installer, server, tmp_path):
+    cache = installer.DownloadCache(tmp_path / "cache")
+    cache.unpack(server, tmp_path / "dest", hashlib.sha256(ARCHIVE).hexdigest(), echo=lambda line: None)
+    assert (tmp_path / "dest" / "src" / "data").stat().st_size == 256 * 4096
+    assert _Handler.ranges[0] is None and _Handler.ranges[1].startswith("bytes=")
+
+
+def test_fetch_removes_a_download_with_the_wrong_sha256(installer, server, tmp_path):
+    cache = installer.DownloadCache(tmp_path / "cache")
+    with pytest.raises(installer.DownloadError, match="SHA-256 mismatch"):
+        cache.fetch(server, "0" * 64, echo=lambda line: None)
+    assert not cache._partial(server).exists()
+    assert cache.lookup(server) is None
+
+
+@pytest.mark.parametrize("keep", [True, False])
+def test_unpack_removes_the_destination_with_the_wrong_sha256(installer, server, tmp_path, keep):
+    # Served whole: the archive is complete, only its digest is wrong
+    _Handler.ranges.append(None)
+    cache = installer.DownloadCache(tmp_path / "cache", keep=keep)
+    with pytest.raises(installer.DownloadError, match="SHA-256 mismatch"):
+        cache.unpack(server, tmp_path / "dest", "0" * 64, echo=lambda line: None)
+    assert not (tmp_path / "dest").exists()
+    assert not cache._partial(server).exists()
+
+
+def test_default_python_source_has_a_published_digest(installer):
+    # Not left to trust on first use
+    default = inspect.signature(installer.install_steps).parameters["python_version"].default
+    assert ".".join(map(str, default)) in installer.PYTHON_SHA256
@@ -0,0 +1,82 @@
+import json
+import subprocess
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def fake_git_pip(installer, monkeypatch):
+    # Checkouts take a while, pip installs are recorded. Features named
+    # in `fail` fail at the given stage.
+    state = {"checkouts": 0, "max_checkouts": 0, "installing": 0, "max_installing": 0, "installed": [], "fail": {}}
+    lock = threading.Lock()
+
+    def feature_checkout(feature, repo_dir):
+        with lock:
+            state["checkouts"] += 1
+            state["max_checkouts"] = max(state["max_checkouts"], state["checkouts"])
+        time.sleep(0.05)
+        with lock:
+            state["checkouts"] -= 1
+        if state["fail"].get(feature.name) == "checkout":
+            raise installer.FeatureError("git clone: fatal: repository not found")
+
+    def run(command, **kwargs):
+        with lock:
+            state["installing"] += 1
+            state["max_installing"] = max(state["max_installing"], state["installing"])
+        time.sleep(0.01)
+        name = command[-1].rsplit("/", 1)[-1]
+        with lock:
+            state["installing"] -= 1
+            if state["fail"].get(name) == "install":
+                return subprocess.CompletedProcess(command, 1, "", "ERROR: no matching distribution")
+            state["installed"].append(name)
+        return subprocess.CompletedProcess(command, 0, "", "")
+
+    monkeypatch.setattr(installer, "feature_checkout", feature_checkout)
+    monkeypatch.setattr(installer.subprocess, "run", run)
+    return state
+
+
+def _features(installer, count):
+    return tuple(installer.Feature(name=f"feature{index}", url=f"https://example.com/feature{index}.git") for index in range(count))
+
+
+def test_clones_are_bounded_and_installs_serialized(installer, fake_git_pip, tmp_path):
+    assert installer.features_install(_features(installer, 6), tmp_path, workers=2, echo=lambda line: None) == 0
+    assert fake_git_pip["max_checkouts"] == 2
+    assert fake_git_pip["max_installing"] == 1
+    assert sorted(fake_git_pip["installed"]) == [f"feature{index}" for index in range(6)]
+
+
+def test_failures_are_reported_and_the_rest_installed(installer, fake_git_pip, tmp_path):
+    fake_git_pip["fail"].update(feature1="checkout", feature3="install")
+    lines = []
+
+    assert installer.features_install(_features(installer, 5), tmp_path, workers=3, echo=lines.append) == 1
+    assert sorted(fake_git_pip["installed"]) == ["feature0", "feature2", "feature4"]
+    assert "[feature1] failed: git clone: fatal: repository not found" in lines
+    assert "[feature3] ERROR: no matching distribution" in lines
+    assert lines[-1] == "Failed features: feature1, feature3"
+
+
+def test_default_takes_the_features_of_the_repository(installer, tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(installer, "features_install", lambda features, **kwargs: calls.append(("features", features)) or 0)
+    monkeypatch.setattr(installer, "nox_run", lambda sessions, **kwargs: calls.append(("nox", sessions)) or 0)
+    repo = tmp_path / "install"
+    repo.mkdir()
+    steps = {step.name: step for step in installer.install_steps(repo, "user")}
+
+    # Without a feature list: the nox sessions, as before
+    assert steps["install_features"].func(lambda line: None) == 0
+    assert calls.pop() == ("nox", ("clone_features", "install_features_into_engine"))
+
+    (repo / installer.FEATURES_FILE).write_text(json.dumps([{"name": "a", "url": "https://example.com/a.git"}]))
+    assert steps["install_features"].func(lambda line: None) == 0
+    assert calls.pop() == ("features", (installer.Feature(name="a", url="https://example.com/a.git"),))
+    # ... and .venv is left to itself
+    assert "clone_features" not in steps["install_openstudiolandscapes"].script().read_text()
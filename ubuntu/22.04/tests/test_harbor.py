@@ -0,0 +1,141 @@
+import http.server
+import json
+import urllib.parse
+
+import pytest
+
+
+class _Harbor(http.server.BaseHTTPRequestHandler):
+    # The parts of the Harbor v2.0 API harbor_reconcile() and
+    # harbor_wait_ready() use, kept in memory
+    protocol_version = "HTTP/1.1"
+    projects = {}
+    robots = []
+    calls = []
+    # Bodies /health answers with, one per request, the last one for good
+    health = []
+
+    def _reply(self, status, body=None):
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self):
+        url = urllib.parse.urlsplit(self.path)
+        path = url.path[len("/api/v2.0"):]
+        query = dict(urllib.parse.parse_qsl(url.query))
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or "null")
+        type(self).calls.append((self.command, path))
+
+        if path == "/health":
+            payload = self.health.pop(0) if len(self.health) > 1 else self.health[0]
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            return self.wfile.write(payload)
+        if path == "/projects" and self.command == "GET":
+            start = (int(query["page"]) - 1) * int(query["page_size"])
+            return self._reply(200, list(self.projects.values())[start:start + int(query["page_size"])])
+        if path == "/projects" and self.command == "POST":
+            if body["project_name"] in self.projects:
+                return self._reply(409, {"errors": [{"message": "exists"}]})
+            self.projects[body["project_name"]] = {
+                "name": body["project_name"],
+                "project_id": len(self.projects) + 1,
+                "metadata": {"public": str(body["public"]).lower()},
+            }
+            return self._reply(201)
+        if path.startswith("/projects/"):
+            name = urllib.parse.unquote(path[len("/projects/"):])
+            if name not in self.projects:
+                return self._reply(404, {"errors": [{"message": "not found"}]})
+            if self.command == "DELETE":
+                del self.projects[name]
+                return self._reply(200)
+            return self._reply(200, self.projects[name])
+        if path == "/robots" and self.command == "GET":
+            project_id = int(query["q"].rsplit("ProjectID=", 1)[-1])
+            return self._reply(200, [robot for robot in self.robots if robot["project_id"] == project_id])
+        if path == "/robots" and self.command == "POST":
+            project = self.projects[body["permissions"][0]["namespace"]]
+            robot = {"name": f"robot${project['name']}+{body['name']}", "project_id": project["project_id"]}
+            self.robots.append(robot)
+            return self._reply(201, {**robot, "secret": "s3cr3t"})
+        self._reply(404, {"errors": [{"message": f"unexpected {self.command} {path}"}]})
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def client(installer, http_server, monkeypatch):
+    monkeypatch.setattr(_Harbor, "projects", {"library": {"name": "library", "project_id": 99, "metadata": {"public": "true"}}})
+    monkeypatch.setattr(_Harbor, "robots", [])
+    monkeypatch.setattr(_Harbor, "calls", [])
+    monkeypatch.setattr(_Harbor, "health", [])
+    with installer.HarborClient(url=http_server(_Harbor), retries=0, echo=lambda line: None) as client:
+        yield client
+
+
+def test_reconcile_creates_deletes_and_adds_robots(installer, client, tmp_path):
+    projects = (
+        installer.HarborProject(name="openstudiolandscapes", robots=(installer.HarborRobot(name="ci"),)),
+        installer.HarborProject(name="library", absent=True),
+    )
+
+    assert installer.harbor_reconcile(client, projects, robots_dir=tmp_path, echo=lambda line: None) == 0
+    assert set(_Harbor.projects) == {"openstudiolandscapes"}
+    assert [robot["name"] for robot in _Harbor.robots] == ["robot$openstudiolandscapes+ci"]
+    secret = tmp_path / "robot_openstudiolandscapes_ci.json"
+    assert json.loads(secret.read_text())["secret"] == "s3cr3t"
+    assert secret.stat().st_mode & 0o777 == 0o600
+
+    # In line already: nothing to change
+    del _Harbor.calls[:]
+    assert installer.harbor_reconcile(client, projects, robots_dir=tmp_path, echo=lambda line: None) == 0
+    assert all(method == "GET" for method, _ in _Harbor.calls)
+
+
+def test_reconcile_reports_failed_projects(installer, client, tmp_path):
+    lines = []
+    projects = (installer.HarborProject(name="openstudiolandscapes", retention_keep=5),)
+
+    # The stand-in has no retention API
+    assert installer.harbor_reconcile(client, projects, robots_dir=tmp_path, echo=lines.append) == 1
+    assert "Failed projects: openstudiolandscapes" in lines
+
+
+def _health(status, **components):
+    return json.dumps({
+        "status": status,
+        "components": [{"name": name, "status": state} for name, state in components.items()],
+    }).encode("utf-8")
+
+
+def test_wait_ready_until_everything_is_healthy(installer, client):
+    _Harbor.health.extend([
+        b"",
+        b"<html>502 Bad Gateway</html>",
+        b"[]",
+        _health("unhealthy", core="healthy", registry="unhealthy"),
+        _health("healthy", core="healthy", registry="healthy"),
+    ])
+    lines = []
+
+    installer.harbor_wait_ready(client, deadline=10, interval=0.01, echo=lines.append)
+    assert not _Harbor.health[:-1]
+    assert any(line.endswith("harbor: unknown") for line in lines)
+    assert any(line.endswith("registry: unhealthy") for line in lines)
+    assert lines[-1].startswith("Harbor is healthy after ")
+
+
+def test_wait_ready_gives_up_on_an_empty_health_report(installer, client):
+    _Harbor.health.append(b"")
+
+    with pytest.raises(TimeoutError, match=r"harbor \(unknown\)"):
+        installer.harbor_wait_ready(client, deadline=0.1, interval=0.01, echo=lambda line: None)
@@ -0,0 +1,103 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def sudo(tmp_path, monkeypatch):
+    # Stands in for sudo: records its arguments and runs them as the
+    # current user (or does whatever the test writes into it)
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    calls = tmp_path / "sudo_calls"
+    calls.write_text("")
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+
+    def sudo(body=None):
+        script = bin_dir / "sudo"
+        script.write_text(f'#!/bin/sh\necho "$*" >> {calls}\n' + (body or 'exec "$@"\n'))
+        script.chmod(0o755)
+        return calls
+
+    return sudo
+
+
+@pytest.fixture
+def helper(installer, sudo):
+    sudo()
+    helper = installer.PrivilegedHelper()
+    assert helper.start()
+    yield helper
+    helper.close()
+
+
+def _spawn(helper, cmd, stdin=b""):
+    # Runs cmd through the helper on pipes, returns (exit code, stdout,
+    # stderr)
+    fds = [os.pipe() for _ in range(3)]
+    os.write(fds[0][1], stdin)
+    os.close(fds[0][1])
+    try:
+        wait = helper.spawn(cmd, fds[0][0], fds[1][1], fds[2][1])
+    finally:
+        # The helper got its own copies
+        for fd in (fds[0][0], fds[1][1], fds[2][1]):
+            os.close(fd)
+    status, max_rss_kb = wait()
+    assert max_rss_kb > 0
+    output = []
+    for read_fd, _ in fds[1:]:
+        with os.fdopen(read_fd, "rb") as f:
+            output.append(f.read())
+    return (os.waitstatus_to_exitcode(status), *output)
+
+
+def test_round_trip(helper, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    assert _spawn(helper, ["sh", "-c", "cat; pwd; echo oops >&2; exit 3"], stdin=b"input\n") == (
+        3, f"input\n{tmp_path}\n".encode(), b"oops\n",
+    )
+
+
+def test_sudo_in_scripts_runs_directly(helper, tmp_path):
+    calls = tmp_path / "sudo_calls"
+    assert len(calls.read_text().splitlines()) == 1
+
+    assert _spawn(helper, ["bash", "-c", "sudo echo as root"]) == (0, b"as root\n", b"")
+    # Only the helper itself went through sudo
+    assert len(calls.read_text().splitlines()) == 1
+
+
+def test_a_command_that_cannot_start_is_an_error(helper):
+    with pytest.raises(OSError, match="Privileged helper: FileNotFoundError"):
+        _spawn(helper, ["/nonexistent/command"])
+
+
+@pytest.mark.skipif(os.geteuid() != 0, reason="hands the socket to another uid")
+def test_other_users_are_turned_away(installer, sudo, monkeypatch):
+    sudo()
+    # Started for uid 12345, asked by root
+    monkeypatch.setattr(installer.os, "getuid", lambda: 12345)
+    with installer.PrivilegedHelper() as helper:
+        assert helper.start()
+        with pytest.raises(OSError, match="uid 0 is not allowed"):
+            _spawn(helper, ["true"])
+
+
+def test_failed_authentication(installer, sudo):
+    calls = sudo("echo 'sudo: 3 incorrect password attempts' >&2\nexit 1\n")
+    helper = installer.PrivilegedHelper()
+
+    assert not helper.start()
+    assert calls.read_text()
+    directory = os.path.dirname(helper.socket_path)
+    helper.close()
+    assert not os.path.exists(directory)
+
+
+def test_close_stops_the_helper(helper):
+    socket_path = helper.socket_path
+    assert os.path.exists(socket_path)
+    helper.close()
+    assert not os.path.exists(socket_path)
@@ -0,0 +1,37 @@
+import os
+import subprocess
+
+import pytest
+
+
+@pytest.mark.skipif(os.geteuid() != 0, reason="runs the script as root, like sudo does")
+def test_build_cache_and_artifact_are_handed_back(installer, tmp_path, monkeypatch):
+    # Rendered by uid 12345, run as root
+    monkeypatch.setattr(installer.os, "getuid", lambda: 12345)
+    monkeypatch.setattr(installer.os, "getgid", lambda: 12345)
+    build_cache = tmp_path / "build-cache"
+    artifacts = tmp_path / "artifacts"
+    script = installer.script_install_python(
+        build_cache_dir=build_cache,
+        artifact_dir=artifacts,
+        install_packages=False,
+    )
+    artifact = installer.python_artifact_path(artifacts, "3.11.11", installer.PYTHON_CONFIGURE_FLAGS)
+    (build_cache / "Python-3.11.11").mkdir(parents=True)
+    (build_cache / "Python-3.11.11" / "python.o").write_text("")
+    artifacts.mkdir()
+    artifact.write_text("")
+
+    # Already installed: exits right away, through the trap
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    (bin_dir / "python3.11").symlink_to("/bin/true")
+    result = subprocess.run(
+        ["bash", script.as_posix()],
+        env={**os.environ, "PATH": f"{bin_dir}:{os.environ['PATH']}"},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    for path in (build_cache, build_cache / "Python-3.11.11" / "python.o", artifacts, artifact):
+        assert (path.stat().st_uid, path.stat().st_gid) == (12345, 12345)
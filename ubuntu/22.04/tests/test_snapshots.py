@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def source(tmp_path):
+    source = tmp_path / "source"
+    (source / "sub").mkdir(parents=True)
+    (source / "sub" / "file").write_text("content")
+    (source / "gone").write_text("content")
+    (source / "link").symlink_to("sub/file")
+    return source
+
+
+@pytest.fixture
+def snapshot(installer, source, tmp_path):
+    def snapshot():
+        return installer.snapshot_create(source, tmp_path / "snapshots", echo=lambda line: None)
+    return snapshot
+
+
+def test_unchanged_source_reuses_the_newest_snapshot(installer, source, snapshot, tmp_path):
+    first = snapshot()
+    assert snapshot() == first
+    assert installer.snapshots_list(tmp_path / "snapshots") == [first]
+
+    # Everything that is left is still linked
+    (source / "gone").unlink()
+    second = snapshot()
+    assert second != first
+    assert (first / "gone").exists() and not (second / "gone").exists()
+    assert os.path.samefile(first / "sub" / "file", second / "sub" / "file")
+    assert installer.snapshots_list(tmp_path / "snapshots") == [first, second]
+
+
+@pytest.mark.parametrize("change", ["content", "added", "symlink", "directory"])
+def test_any_change_takes_a_new_snapshot(source, snapshot, change):
+    first = snapshot()
+    if change == "content":
+        (source / "sub" / "file").write_text("changed")
+        os.utime(source / "sub" / "file", ns=(0, 0))
+    elif change == "added":
+        (source / "new").write_text("content")
+    elif change == "symlink":
+        (source / "link").unlink()
+        (source / "link").symlink_to("gone")
+    else:
+        (source / "empty").mkdir()
+
+    second = snapshot()
+    assert second != first
+    assert snapshot() == second
+
+
+def test_skipped_paths_are_left_out(source, snapshot):
+    (source / ".venv").mkdir()
+    (source / ".venv" / "python").write_text("")
+    (source / ".landscapes" / ".harbor").mkdir(parents=True)
+    (source / ".landscapes" / ".harbor" / "registry").write_text("")
+
+    first = snapshot()
+    assert not (first / ".venv").exists()
+    assert (first / ".landscapes").is_dir() and not (first / ".landscapes" / ".harbor").exists()
+
+
+def test_prune_keeps_the_newest(installer, source, snapshot, tmp_path):
+    snapshots = tmp_path / "snapshots"
+    taken = []
+    for index in range(4):
+        (source / "sub" / "file").write_text(f"content {index}")
+        taken.append(snapshot())
+    (snapshots / ".interrupted.partial").mkdir()
+
+    installer.snapshots_prune(snapshots, keep=2, echo=lambda line: None)
+    assert installer.snapshots_list(snapshots) == taken[-2:]
+    assert not (snapshots / ".interrupted.partial").exists()
+
+    # The newest one stays, however large
+    installer.snapshots_prune(snapshots, keep=0, max_bytes=0, echo=lambda line: None)
+    assert installer.snapshots_list(snapshots) == taken[-1:]
+
+
+def test_prune_counts_linked_files_once(installer, source, snapshot, tmp_path):
+    snapshots = tmp_path / "snapshots"
+    (source / "large").write_bytes(os.urandom(1024 * 1024))
+    first = snapshot()
+    (source / "sub" / "file").write_text("changed")
+    second = snapshot()
+
+    # The second snapshot shares "large" with the first one, which
+    # only adds its few small files
+    installer.snapshots_prune(snapshots, max_bytes=1536 * 1024, echo=lambda line: None)
+    assert installer.snapshots_list(snapshots) == [first, second]
+    installer.snapshots_prune(snapshots, max_bytes=1024 * 1024, echo=lambda line: None)
+    assert installer.snapshots_list(snapshots) == [second]
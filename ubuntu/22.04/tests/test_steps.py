@@ -0,0 +1,254 @@
+import threading
+import time
+
+
+def test_resume_skips_dependents_of_uncheckpointed_steps(installer, tmp_path):
+    calls = []
+
+    def _step(name):
+        def func(echo):
+            calls.append(name)
+            return 0
+        return func
+
+    def _steps():
+        return [
+            installer.Step(name="check", func=_step("check"), checkpoint=False),
+            installer.Step(name="build", func=_step("build"), depends=("check",)),
+            installer.Step(name="deploy", func=_step("deploy"), depends=("build",)),
+        ]
+
+    for _ in range(2):
+        checkpoint = installer.Checkpoint(install_dir=tmp_path / "install", state_file=tmp_path / "state.json")
+        assert installer.steps_run(_steps(), workers=1, checkpoint=checkpoint) == 0
+
+    assert calls == ["check", "build", "deploy", "check"]
+
+
+def test_apt_plans_packages_of_selected_steps_only(installer, tmp_path, monkeypatch):
+    dpkg_status = installer.DpkgStatus
+    # Nothing installed
+    monkeypatch.setattr(installer, "DpkgStatus", lambda: dpkg_status(tmp_path / "status"))
+
+    def _apt_script(**kwargs):
+        steps = installer.install_steps(tmp_path / "install", "user", **kwargs)
+        apt = next(step for step in steps if step.name == "apt")
+        return apt.script().read_text()
+
+    # Only install_python needs these
+    python_only = ("build-essential", "libssl-dev", "libffi-dev")
+    assert set(python_only) <= set(installer.python_packages())
+
+    assert all(package in _apt_script() for package in python_only)
+    skipped = _apt_script(skip=("install_python",))
+    assert not any(package in skipped for package in python_only)
+
+
+def test_clone_discards_local_changes_only_after_a_snapshot(installer, tmp_path, monkeypatch):
+    monkeypatch.setattr(installer, "snapshots_dir", lambda install_dir: tmp_path / "snapshots")
+    install_dir = tmp_path / "install"
+    (install_dir / ".git").mkdir(parents=True)
+
+    def _steps(**kwargs):
+        return {step.name: step for step in installer.install_steps(install_dir, "user", **kwargs)}
+
+    clone = _steps(skip=("snapshot_openstudiolandscapes",))["clone_openstudiolandscapes"]
+    assert "reset --hard" not in clone.script().read_text()
+
+    steps = _steps()
+    assert steps["snapshot_openstudiolandscapes"].func(lambda line: None) == 0
+    assert "reset --hard" in steps["clone_openstudiolandscapes"].script().read_text()
+
+
+def test_uncheckpointed_steps_pass_on_that_their_dependencies_ran(installer, tmp_path):
+    # Shaped like harbor_prepare -> harbor_up -> harbor_ready ->
+    # harbor_init -> harbor_down
+    calls = []
+
+    def _steps(prepare_inputs):
+        def _step(name, **kwargs):
+            def func(echo):
+                calls.append(name)
+                return 0
+            return installer.Step(name=name, func=func, **kwargs)
+
+        return [
+            _step("prepare", inputs=prepare_inputs),
+            _step("up", depends=("prepare",), checkpoint=False),
+            _step("ready", depends=("up",), checkpoint=False),
+            _step("init", depends=("ready",)),
+            _step("down", depends=("init",), checkpoint=False),
+        ]
+
+    def _run(prepare_inputs):
+        del calls[:]
+        checkpoint = installer.Checkpoint(install_dir=tmp_path / "install", state_file=tmp_path / "state.json")
+        assert installer.steps_run(_steps(prepare_inputs), workers=1, checkpoint=checkpoint) == 0
+        return calls
+
+    assert _run("a") == ["prepare", "up", "ready", "init", "down"]
+    # Unchanged: up and down, but nothing to provision
+    assert _run("a") == ["up", "ready", "down"]
+    # prepare ran again: so must init
+    assert _run("b") == ["prepare", "up", "ready", "init", "down"]
+
+
+def test_harbor_runs_up_and_down_every_time(installer, tmp_path):
+    steps = {step.name: step for step in installer.install_steps(tmp_path / "install", "user")}
+    assert not any(steps[name].checkpoint for name in ("harbor_up", "harbor_ready", "harbor_down"))
+    assert steps["harbor_init"].checkpoint
+
+
+def test_checkpointed_func_steps_fingerprint_their_arguments(installer, tmp_path):
+    def _fingerprints(**kwargs):
+        return {
+            step.name: installer.Checkpoint.fingerprint(step, None)
+            for step in installer.install_steps(tmp_path / "install", "user", **kwargs)
+            if step.func is not None and step.checkpoint
+        }
+
+    default = _fingerprints()
+    assert "harbor_init" in default
+    for kwargs in (
+        dict(harbor_url="http://harbor.example:8080"),
+        dict(harbor_password="other"),
+        dict(harbor_projects=(installer.HarborProject(name="other"),)),
+    ):
+        changed = _fingerprints(**kwargs)
+        assert changed["harbor_init"] != default["harbor_init"]
+        assert {name for name in default if changed[name] != default[name]} == {"harbor_init"}
+
+
+def _timed_steps(installer, log, spec, delay=0.05):
+    # spec: name -> Step keyword arguments; every step logs its start
+    # and end
+    lock = threading.Lock()
+    running = []
+
+    def _step(name, **kwargs):
+        def func(echo):
+            with lock:
+                running.append(name)
+                log.append(("start", name, len(running)))
+            time.sleep(delay)
+            with lock:
+                running.remove(name)
+                log.append(("end", name, len(running)))
+            return 0
+        return installer.Step(name=name, func=func, **kwargs)
+
+    return [_step(name, **kwargs) for name, kwargs in spec.items()]
+
+
+def test_steps_wait_for_their_dependencies(installer):
+    log = []
+    steps = _timed_steps(installer, log, {
+        "a": {},
+        "b": {"depends": ("a",)},
+        "c": {"depends": ("a",)},
+        "d": {"depends": ("b", "c")},
+    })
+    assert installer.steps_run(steps, workers=3, headless=True, verbose=False) == 0
+
+    order = [(event, name) for event, name, _ in log]
+    for dep, step in (("a", "b"), ("a", "c"), ("b", "d"), ("c", "d")):
+        assert order.index(("end", dep)) < order.index(("start", step))
+    # b and c overlap
+    assert order.index(("start", "c")) < order.index(("end", "b"))
+
+
+def test_at_most_workers_steps_run_at_once(installer):
+    log = []
+    spec = {"background": {"background": True}, **{f"step{index}": {} for index in range(5)}}
+    steps = _timed_steps(installer, log, spec)
+    assert installer.steps_run(steps, workers=2, headless=True, verbose=False) == 0
+
+    # Two foreground steps, and the background one on top
+    assert max(running for _, _, running in log) == 3
+    assert {name for _, name, _ in log} == set(spec)
+
+
+def test_a_step_that_cannot_run_fails_without_stopping_the_others(installer, tmp_path, monkeypatch):
+    def script_run_captured(**kwargs):
+        raise OSError("out of ptys")
+
+    monkeypatch.setattr(installer, "script_run_captured", script_run_captured)
+    log = []
+    script = tmp_path / "broken.sh"
+    script.write_text("exit 0\n")
+    steps = [
+        installer.Step(name="broken", script=lambda: script),
+        *_timed_steps(installer, log, {"other": {}, "after": {"depends": ("broken",)}}, delay=0.2),
+    ]
+    events = installer.EventLog(tmp_path / "events.jsonl")
+
+    assert installer.steps_run(steps, workers=2, headless=True, events=events, verbose=False) == 1
+    # The running step finished, the dependent never started
+    assert [(event, name) for event, name, _ in log] == [("start", "other"), ("end", "other")]
+    ends = {event["step"]: event["rc"] for event in events.load() if event["event"] == "end"}
+    assert ends == {"broken": 1, "other": 0}
+
+
+def _batched(installer, tmp_path, spec):
+    # spec: name -> nox_step keyword arguments, one session per step
+    # named like the step; returns the batched steps' names and
+    # dependencies
+    steps = []
+    for name, kwargs in spec.items():
+        if kwargs.pop("nox", True):
+            steps.append(installer.nox_step(name=name, repo_dir=tmp_path, sessions=(name,), **kwargs))
+        else:
+            steps.append(installer.Step(name=name, func=lambda echo: 0, **kwargs))
+    return {step.name: step.depends for step in installer.steps_batch_nox(steps, tmp_path)}
+
+
+def test_batch_merges_a_chain_of_nox_steps(installer, tmp_path):
+    assert _batched(installer, tmp_path, {
+        "clone": dict(nox=False),
+        "a": dict(depends=("clone",)),
+        "b": dict(depends=("a",)),
+        "other": dict(nox=False),
+        "c": dict(depends=("b", "other")),
+        "after": dict(nox=False, depends=("c",)),
+    }) == {"clone": (), "other": (), "a+b+c": ("clone", "other"), "after": ("a+b+c",)}
+
+
+def test_batch_merges_only_alike_steps(installer, tmp_path):
+    for flag in ("background", "checkpoint", "sudo", "interactive"):
+        default = installer.Step.__dataclass_fields__[flag].default
+        assert set(_batched(installer, tmp_path, {
+            "a": dict(),
+            "b": dict(depends=("a",), **{flag: not default}),
+        })) == {"a", "b"}, flag
+
+
+def test_batch_keeps_the_order_of_other_steps(installer, tmp_path):
+    # Something else waits for the first step only
+    assert set(_batched(installer, tmp_path, {
+        "a": dict(),
+        "b": dict(depends=("a",)),
+        "outside": dict(nox=False, depends=("a",)),
+    })) == {"a", "b", "outside"}
+    # ... fine if it waits for the second one too
+    assert set(_batched(installer, tmp_path, {
+        "a": dict(),
+        "b": dict(depends=("a",)),
+        "outside": dict(nox=False, depends=("a", "b")),
+    })) == {"a+b", "outside"}
+    # The second step waits for something that waits for the first one
+    assert set(_batched(installer, tmp_path, {
+        "a": dict(),
+        "between": dict(nox=False, depends=("a",)),
+        "b": dict(depends=("a", "between")),
+    })) == {"a", "between", "b"}
+    # Unrelated nox steps stay apart
+    assert set(_batched(installer, tmp_path, {"a": dict(), "b": dict()})) == {"a", "b"}
+
+
+def test_batch_leaves_harbor_prepare_and_up_apart(installer, tmp_path):
+    # harbor_up isn't checkpointed (and may run in the background),
+    # harbor_prepare is
+    for harbor_background in (False, True):
+        steps = installer.install_steps(tmp_path / "install", "user", harbor_background=harbor_background)
+        names = {step.name for step in installer.steps_batch_nox(steps, tmp_path / "install")}
+        assert {"harbor_prepare", "harbor_up", "harbor_down"} <= names
@@ -0,0 +1,164 @@
+import functools
+import hashlib
+import http.server
+import os
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+
+BACKEND = '''\
+import os
+
+
+def get_requires_for_build_editable(config_settings=None):
+    return []
+
+
+def prepare_metadata_for_build_editable(metadata_directory, config_settings=None):
+    os.makedirs(os.path.join(metadata_directory, "demo-1.0.dist-info"))
+    with open(os.path.join(metadata_directory, "demo-1.0.dist-info", "METADATA"), "w") as f:
+        f.write("Metadata-Version: 2.1\\nName: demo\\nVersion: 1.0\\nRequires-Dist: demo-dep\\nProvides-Extra: dev\\n")
+    return "demo-1.0.dist-info"
+
+
+def build_editable(wheel_directory, config_settings=None, metadata_directory=None):
+    raise NotImplementedError
+'''
+
+PYPROJECT = '''\
+[build-system]
+requires = []
+build-backend = "backend"
+backend-path = ["."]
+
+[project]
+name = "demo"
+version = "1.0"
+dependencies = ["demo-dep"]
+
+[project.optional-dependencies]
+dev = []
+'''
+
+
+def _wheel(directory, name, version="1.0"):
+    # Metadata only, which is all pip --dry-run looks at
+    filename = f"{name.replace('-', '_')}-{version}-py3-none-any.whl"
+    dist_info = f"{name.replace('-', '_')}-{version}.dist-info"
+    with zipfile.ZipFile(directory / filename, "w") as wheel:
+        wheel.writestr(f"{dist_info}/METADATA", f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n")
+        wheel.writestr(f"{dist_info}/WHEEL", "Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: true\nTag: py3-none-any\n")
+        wheel.writestr(f"{dist_info}/RECORD", "")
+    return filename
+
+
+class _Index(http.server.SimpleHTTPRequestHandler):
+    requests = []
+    # Served once (to pip's resolver), gone afterwards
+    vanishing = set()
+
+    def do_GET(self):
+        if self.path in self.vanishing and self.path in self.requests:
+            type(self).requests.append(self.path)
+            return self.send_error(404)
+        type(self).requests.append(self.path)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def index(installer, http_server, tmp_path, monkeypatch):
+    # A PEP 503 "simple" index of the project's dependencies
+    root = tmp_path / "index"
+    (root / "files").mkdir(parents=True)
+    for name in ("pip", "setuptools", "setuptools-scm", "wheel", "demo-dep"):
+        filename = _wheel(root / "files", name)
+        sha256 = hashlib.sha256((root / "files" / filename).read_bytes()).hexdigest()
+        (root / "simple" / name).mkdir(parents=True)
+        (root / "simple" / name / "index.html").write_text(
+            f'<html><body><a href="../../files/{filename}#sha256={sha256}">{filename}</a></body></html>'
+        )
+    monkeypatch.setattr(_Index, "requests", [])
+    monkeypatch.setattr(_Index, "vanishing", set())
+    url = http_server(functools.partial(_Index, directory=root.as_posix()))
+    # Nothing but this index
+    for name in os.environ:
+        if name.startswith("PIP_"):
+            monkeypatch.delenv(name)
+    monkeypatch.setenv("PIP_INDEX_URL", f"{url}/simple/")
+    monkeypatch.setenv("PIP_CONFIG_FILE", "/dev/null")
+    monkeypatch.setenv("PIP_DISABLE_PIP_VERSION_CHECK", "1")
+    monkeypatch.setenv("PIP_NO_CACHE_DIR", "1")
+    return url
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "pyproject.toml").write_text(PYPROJECT)
+    (repo / "backend.py").write_text(BACKEND)
+    return repo
+
+
+def test_interpreter_key_leaves_out_the_build(installer, tmp_path):
+    python = tmp_path / "bin" / "python3"
+    python.parent.mkdir()
+    python.symlink_to(sys.executable)
+
+    key = installer.wheelhouse_interpreter_key(sys.executable)
+    assert installer.wheelhouse_interpreter_key(python.as_posix()) == key
+    # No path, no build date
+    assert sys.version not in key
+    assert sys.executable not in key
+    assert ".".join(map(str, sys.version_info[:3])) in key
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="reads pyproject.toml with tomllib")
+def test_fill_then_install_offline(installer, index, repo, tmp_path):
+    wheelhouse = tmp_path / "wheelhouse"
+    key = installer.venv_key(repo, installer.wheelhouse_interpreter_key(sys.executable))
+
+    assert installer.wheelhouse_fill(sys.executable, repo, wheelhouse, key, echo=print)
+    assert installer.wheelhouse_complete(wheelhouse, key)
+    assert {path.name for path in wheelhouse.glob("*.whl")} == {
+        "pip-1.0-py3-none-any.whl",
+        "setuptools-1.0-py3-none-any.whl",
+        "setuptools_scm-1.0-py3-none-any.whl",
+        "wheel-1.0-py3-none-any.whl",
+        "demo_dep-1.0-py3-none-any.whl",
+    }
+
+    # Complete: the next node doesn't ask the index at all
+    requests = len(_Index.requests)
+    assert installer.wheelhouse_fill(sys.executable, repo, wheelhouse, key, echo=print)
+    assert len(_Index.requests) == requests
+
+    # ... and installs with --no-index
+    result = subprocess.run(
+        [
+            sys.executable, "-m", "pip", "install", "--dry-run", "--ignore-installed", "--quiet",
+            "--no-index", "--find-links", wheelhouse.as_posix(),
+            *installer.VENV_BOOTSTRAP_PKGS, "-e", f"{repo.as_posix()}[dev]",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert len(_Index.requests) == requests
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="reads pyproject.toml with tomllib")
+def test_fill_reports_what_it_cannot_download(installer, index, repo, tmp_path):
+    _Index.vanishing.add("/files/demo_dep-1.0-py3-none-any.whl")
+    lines = []
+    key = installer.venv_key(repo, installer.wheelhouse_interpreter_key(sys.executable))
+
+    assert not installer.wheelhouse_fill(sys.executable, repo, tmp_path / "wheelhouse", key, echo=lines.append)
+    assert not installer.wheelhouse_complete(tmp_path / "wheelhouse", key)
+    assert "1 downloads failed, the wheelhouse is incomplete." in lines